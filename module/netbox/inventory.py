@@ -104,7 +104,10 @@ class NetBoxInventory:
             raise AttributeError("'%s' object must be a sub class of '%s'." %
                                  (object_type.__name__, NetBoxObject.__name__))
 
-        if data is None or len(self.get_all_items(object_type)) == 0:
+        # fetch the item list once, it is used by every lookup below
+        all_items = self.get_all_items(object_type)
+
+        if data is None or len(all_items) == 0:
             return
 
         if not isinstance(data, dict):
@@ -118,14 +121,14 @@ class NetBoxInventory:
         # try to find object by slug
         if "slug" in object_type.data_model.keys() and data.get("name") is not None:
             object_slug = NetBoxObject.format_slug(data.get("name"))
-            for this_object in self.get_all_items(object_type):
+            for this_object in all_items:
                 if this_object.data.get("slug") == object_slug:
                     return this_object
 
         # try to find by primary/secondary key
         elif data.get(object_type.primary_key) is not None:
             object_name_to_find = None
-            for this_object in self.get_all_items(object_type):
+            for this_object in all_items:
 
                 if object_name_to_find is None:
                     object_name_to_find = this_object.get_display_name(data, including_second_key=True)
@@ -139,7 +142,7 @@ class NetBoxInventory:
         # try to match all data attributes
         else:
 
-            for this_object in self.get_all_items(object_type):
+            for this_object in all_items:
                 all_items_match = True
                 for attr_name, attr_value in data.items():
 
@@ -31,6 +31,15 @@ class SourceBase:
     init_successful = False
     name = None
 
+    # longest matching prefix per IP address and site
+    prefix_lookup_cache = None
+
+    # prefixes grouped by their site
+    prefix_site_index = None
+
+    # custom fields which have already been added/updated by this source
+    custom_field_cache = None
+
     def set_source_tag(self):
         self.source_tag = f"Source: {self.name}"
 
@@ -203,6 +212,15 @@ class SourceBase:
         if not isinstance(ip_to_match, (IPv4Address, IPv6Address)):
             raise ValueError("Value of 'ip_to_match' needs to be an IPv4Address or IPv6Address object.")
 
+        # the matching prefix only depends on the address, not the prefix length of an IP interface
+        cache_key = (ip_to_match.version, int(ip_to_match), site_name)
+
+        if self.prefix_lookup_cache is None:
+            self.prefix_lookup_cache = dict()
+
+        if cache_key in self.prefix_lookup_cache:
+            return self.prefix_lookup_cache[cache_key]
+
         site_object = None
         if site_name is not None:
             site_object = self.inventory.get_by_data(NBSite, data={"name": site_name})
@@ -215,22 +233,44 @@ class SourceBase:
         current_longest_matching_prefix_length = 0
         current_longest_matching_prefix = None
 
-        for prefix in self.inventory.get_all_items(NBPrefix):
-
-            if grab(prefix, "data.site") != site_object:
-                continue
-
-            prefix_network = grab(prefix, f"data.{NBPrefix.primary_key}")
-            if prefix_network is None:
-                continue
+        for prefix_network, prefix in self.get_prefix_site_index().get(site_object, list()):
 
             if ip_to_match in prefix_network and \
                     prefix_network.prefixlen >= current_longest_matching_prefix_length:
                 current_longest_matching_prefix_length = prefix_network.prefixlen
                 current_longest_matching_prefix = prefix
 
+        self.prefix_lookup_cache[cache_key] = current_longest_matching_prefix
+
         return current_longest_matching_prefix
 
+    def get_prefix_site_index(self):
+        """
+        Return all prefixes of the inventory grouped by site. Prefixes without a site are
+        grouped under None. Prefixes are only read from NetBox, the index is built on first use.
+
+        Returns
+        -------
+        dict: {NBSite: [list of (IPv4Network/IPv6Network, NBPrefix) tuples]}
+        """
+
+        if self.prefix_site_index is None:
+            self.prefix_site_index = dict()
+            for prefix in self.inventory.get_all_items(NBPrefix):
+
+                prefix_network = grab(prefix, f"data.{NBPrefix.primary_key}")
+                if prefix_network is None:
+                    continue
+
+                # skip prefixes with an unresolved site, they never matched any site lookup
+                prefix_site = grab(prefix, "data.site")
+                if prefix_site is not None and not isinstance(prefix_site, NBSite):
+                    continue
+
+                self.prefix_site_index.setdefault(prefix_site, list()).append((prefix_network, prefix))
+
+        return self.prefix_site_index
+
     def add_update_interface(self, interface_object, device_object, interface_data, interface_ips=None,
                              vmware_object=None):
         """
@@ -787,6 +827,19 @@ class SourceBase:
         data["name"] = NetBoxObject.format_slug(
             re.sub('-+', '-', data.get("name").replace("_", "-")).strip("-"), 100)[0:50].replace("-", "_")
 
+        # the same custom field definition gets submitted for every object, updating it again changes nothing
+        object_types = data.get("object_types")
+        if isinstance(object_types, list):
+            object_types = tuple(object_types)
+
+        cache_key = (data.get("name"), object_types)
+
+        if self.custom_field_cache is None:
+            self.custom_field_cache = dict()
+
+        if cache_key in self.custom_field_cache:
+            return self.custom_field_cache[cache_key]
+
         custom_field = self.inventory.get_by_data(NBCustomField, data={"name": data.get("name")})
 
         if custom_field is None:
@@ -794,6 +847,8 @@ class SourceBase:
         else:
             custom_field.update(data={"object_types": data.get("object_types")}, source=self)
 
+        self.custom_field_cache[cache_key] = custom_field
+
         return custom_field
 
 # EOF
@@ -8,7 +8,7 @@
 #  repository or visit: <https://opensource.org/licenses/MIT>.
 
 import datetime
-import pprint
+import heapq
 import ssl
 from ipaddress import ip_address, ip_interface
 from urllib.parse import unquote
@@ -28,7 +28,7 @@ from pyVmomi.VmomiSupport import VmomiJSONEncoder
 
 from module.sources.common.source_base import SourceBase
 from module.sources.vmware.config import VMWareConfig
-from module.common.logging import get_logger, DEBUG3
+from module.common.logging import get_logger, DEBUG2, DEBUG3
 from module.common.misc import grab, dump, get_string_or_none, plural
 from module.common.support import normalize_mac_address
 from module.netbox.inventory import NetBoxInventory
@@ -45,6 +45,10 @@ except ImportError:
 
 log = get_logger()
 
+# object types accepted by the object lookup methods
+device_vm_object_types = frozenset({NBDevice, NBVM})
+cluster_device_object_types = frozenset({NBCluster, NBDevice})
+
 
 # noinspection PyTypeChecker
 class VMWareHandler(SourceBase):
@@ -98,6 +102,13 @@ class VMWareHandler(SourceBase):
         settings_handler.source_name = self.name
         self.settings = settings_handler.parse()
 
+        # prepare relation settings once, they are evaluated for every parsed object
+        self._relation_cfg = dict()
+        self._relation_cache = dict()
+        self._site_name_cache = dict()
+        for relation in [x for x in vars(self.settings) if x.endswith("_relation")]:
+            self.parse_relation_config(relation)
+
         self.set_source_tag()
         self.site_name = f"vCenter: {name}"
 
@@ -106,6 +117,7 @@ class VMWareHandler(SourceBase):
             return
 
         self._sdk_instance = None
+        self._ssl_context = None
         self.create_sdk_session()
 
         if self.session is None:
@@ -126,12 +138,25 @@ class VMWareHandler(SourceBase):
         }
         self.processed_host_names = dict()
         self.processed_vm_names = dict()
-        self.processed_vm_uuid = list()
+        self.processed_vm_uuid = set()
         self.object_cache = dict()
         self.parsing_vms_the_first_time = True
         self.objects_to_reevaluate = list()
         self.parsing_objects_to_reevaluate = False
 
+        # lookup indexes of inventory objects, built on first use
+        self._mac_index = dict()
+        self._primary_ip_index = dict()
+        self._primary_ip_owner_index = None
+        self._cluster_name_index = None
+        self._source_cluster_group = None
+
+        # reverse index of vCenter hosts and the cluster they belong to
+        self._host_to_cluster = dict()
+
+        # vCenter tag definitions, tag id as key
+        self._tag_cache = dict()
+
     def create_sdk_session(self):
         """
         Initialize SDK session with vCenter
@@ -146,15 +171,17 @@ class VMWareHandler(SourceBase):
 
         log.debug(f"Starting vCenter SDK connection to '{self.settings.host_fqdn}'")
 
-        ssl_context = ssl.create_default_context()
-        if self.settings.validate_tls_certs is False:
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
+        # loading the CA bundle is expensive, reuse the context if the session gets recreated
+        if self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context()
+            if self.settings.validate_tls_certs is False:
+                self._ssl_context.check_hostname = False
+                self._ssl_context.verify_mode = ssl.CERT_NONE
 
         connection_params = dict(
             host=self.settings.host_fqdn,
             port=self.settings.port,
-            sslContext=ssl_context
+            sslContext=self._ssl_context
         )
 
         # uses connect.SmartStubAdapter
@@ -286,6 +313,24 @@ class VMWareHandler(SourceBase):
 
         log.info(f"Query data from vCenter: '{self.settings.host_fqdn}'")
 
+        # reset inventory lookup indexes, other sources may have changed the inventory in the meantime
+        self._mac_index = dict()
+        self._primary_ip_index = dict()
+        self._primary_ip_owner_index = None
+        self._cluster_name_index = None
+        self._source_cluster_group = None
+        self._host_to_cluster = dict()
+        self._tag_cache = dict()
+
+        # NetBox API version does not change during the run, evaluate model differences only once
+        netbox_api_version = version.parse(self.inventory.netbox_api_version)
+        self.netbox_supports_interface_speed = netbox_api_version >= version.parse("3.2.0")
+        self.netbox_supports_vm_site = netbox_api_version >= version.parse("3.3.0")
+        self.netbox_supports_virtual_disks = netbox_api_version >= version.parse("3.7.0")
+
+        # log level does not change during the run, checked for every parsed object
+        self.debug3_enabled = log.level == DEBUG3
+
         """
         Mapping of object type keywords to view types and handlers
 
@@ -384,16 +429,18 @@ class VMWareHandler(SourceBase):
                 self.parsing_vms_the_first_time = False
                 log.debug("Iterating over all virtual machines a second time ")
 
+            view_handler = view_details.get("view_handler")
+
             for obj in view_objects:
 
-                if log.level == DEBUG3:
+                if self.debug3_enabled is True:
                     try:
                         dump(obj)
                     except Exception as e:
                         log.error(e)
 
                 # noinspection PyArgumentList
-                view_details.get("view_handler")(obj)
+                view_handler(obj)
 
             container_view.Destroy()
 
@@ -461,10 +508,15 @@ class VMWareHandler(SourceBase):
         str: site name if a relation was found
         """
 
-        if object_type not in [NBCluster, NBDevice]:
+        if object_type not in cluster_device_object_types:
             raise ValueError(f"Object must be a '{NBCluster.name}' or '{NBDevice.name}'.")
 
-        log.debug2(f"Trying to find site name for {object_type.name} '{object_name}'")
+        # site name only depends on the relation settings, hosts and VMs of a cluster share the result
+        cache_key = (object_type.name, object_name, cluster_name)
+        if cache_key in self._site_name_cache:
+            return self._site_name_cache[cache_key]
+
+        log.debug2("Trying to find site name for %s '%s'", object_type.name, object_name)
 
         # check if site was provided in config
         relation_name = "host_site_relation" if object_type == NBDevice else "cluster_site_relation"
@@ -474,7 +526,7 @@ class VMWareHandler(SourceBase):
         if object_type == NBDevice and site_name is None:
             site_name = self.get_site_name(NBCluster, cluster_name)
             if site_name is not None:
-                log.debug2(f"Found a matching cluster site for {object_name}, using site '{site_name}'")
+                log.debug2("Found a matching cluster site for %s, using site '%s'", object_name, site_name)
 
         # set default site name
         if site_name is None:
@@ -484,7 +536,9 @@ class VMWareHandler(SourceBase):
         # set the site for cluster to None if None-keyword ("<NONE>") is set via cluster_site_relation
         if object_type == NBCluster and site_name == "<NONE>":
             site_name = None
-            log.debug2(f"Site relation for '{object_name}' set to None")
+            log.debug2("Site relation for '%s' set to None", object_name)
+
+        self._site_name_cache[cache_key] = site_name
 
         return site_name
 
@@ -520,7 +574,7 @@ class VMWareHandler(SourceBase):
 
         object_to_return = None
 
-        if object_type not in [NBDevice, NBVM]:
+        if object_type not in device_vm_object_types:
             raise ValueError(f"Object must be a '{NBVM.name}' or '{NBDevice.name}'.")
 
         if mac_list is None or not isinstance(mac_list, list) or len(mac_list) == 0:
@@ -531,17 +585,24 @@ class VMWareHandler(SourceBase):
         objects_with_matching_macs = dict()
         matching_object = None
 
-        for interface in self.inventory.get_all_items(interface_typ):
+        candidates = self.get_interface_mac_index(interface_typ)
+
+        # each interface must only be counted once, even if a MAC address is listed multiple times
+        for mac in set(mac_list):
+
+            for interface in candidates.get(mac, ()):
 
-            if grab(interface, "data.mac_address") in mac_list:
+                # index entry is outdated if MAC address of the interface has changed
+                if grab(interface, "data.mac_address") != mac:
+                    continue
 
                 matching_object = grab(interface, f"data.{interface.secondary_key}")
                 if not isinstance(matching_object, (NBDevice, NBVM)):
                     continue
 
-                log.debug2("Found matching MAC '%s' on %s '%s'" %
-                           (grab(interface, "data.mac_address"), object_type.name,
-                            matching_object.get_display_name(including_second_key=True)))
+                if log.isEnabledFor(DEBUG2):
+                    log.debug2("Found matching MAC '%s' on %s '%s'",
+                               mac, object_type.name, matching_object.get_display_name(including_second_key=True))
 
                 if objects_with_matching_macs.get(matching_object) is None:
                     objects_with_matching_macs[matching_object] = 1
@@ -553,8 +614,9 @@ class VMWareHandler(SourceBase):
 
         if num_devices_witch_matching_macs == 1 and isinstance(matching_object, (NBDevice, NBVM)):
 
-            log.debug2("Found one %s '%s' based on MAC addresses and using it" %
-                       (object_type.name, matching_object.get_display_name(including_second_key=True)))
+            if log.isEnabledFor(DEBUG2):
+                log.debug2("Found one %s '%s' based on MAC addresses and using it",
+                           object_type.name, matching_object.get_display_name(including_second_key=True))
 
             object_to_return = list(objects_with_matching_macs.keys())[0]
 
@@ -564,7 +626,7 @@ class VMWareHandler(SourceBase):
 
             # now select the two top matches
             first_choice, second_choice = \
-                sorted(objects_with_matching_macs, key=objects_with_matching_macs.get, reverse=True)[0:2]
+                heapq.nlargest(2, objects_with_matching_macs, key=objects_with_matching_macs.get)
 
             first_choice_matches = objects_with_matching_macs.get(first_choice)
             second_choice_matches = objects_with_matching_macs.get(second_choice)
@@ -586,11 +648,155 @@ class VMWareHandler(SourceBase):
 
         return object_to_return
 
+    def get_interface_mac_index(self, interface_type):
+        """
+        Return all interfaces of 'interface_type' indexed by MAC address. The index is built on first
+        use and afterwards kept up to date via 'add_interface_to_mac_index'.
+
+        Parameters
+        ----------
+        interface_type: (NBInterface, NBVMInterface)
+            type of interfaces to index
+
+        Returns
+        -------
+        dict: {"$mac_address": [list of interface objects]}
+        """
+
+        mac_index = self._mac_index.get(interface_type)
+
+        if mac_index is None:
+            mac_index = dict()
+            for interface in self.inventory.get_all_items(interface_type):
+                interface_mac = grab(interface, "data.mac_address")
+                if interface_mac is not None:
+                    mac_index.setdefault(interface_mac, list()).append(interface)
+
+            self._mac_index[interface_type] = mac_index
+
+        return mac_index
+
+    def add_interface_to_mac_index(self, interface):
+        """
+        Add a new or updated interface to the MAC address index
+
+        Parameters
+        ----------
+        interface: (NBInterface, NBVMInterface)
+            interface object to add
+        """
+
+        # index has not been built yet, interface will be picked up from inventory
+        mac_index = self._mac_index.get(type(interface))
+        if mac_index is None:
+            return
+
+        interface_mac = grab(interface, "data.mac_address")
+        if interface_mac is None:
+            return
+
+        interfaces = mac_index.setdefault(interface_mac, list())
+        if interface not in interfaces:
+            interfaces.append(interface)
+
+    def get_primary_ip_address(self, device_primary_ip):
+        """
+        Return the address (without prefix length) of a primary IP reference of a NBDevice or NBVM
+
+        Parameters
+        ----------
+        device_primary_ip: dict, int
+            value of 'primary_ip4' or 'primary_ip6' of a device or VM
+
+        Returns
+        -------
+        str, None: IP address if it could be determined, otherwise None
+        """
+
+        ip = None
+        if isinstance(device_primary_ip, dict):
+            ip = grab(device_primary_ip, "address")
+
+        elif isinstance(device_primary_ip, int):
+            ip = self.inventory.get_by_id(NBIPAddress, nb_id=device_primary_ip)
+            ip = grab(ip, "data.address")
+
+        if ip is None:
+            return
+
+        return ip.partition("/")[0]
+
+    def get_primary_ip_index(self, object_type):
+        """
+        Return all objects of 'object_type' indexed by their primary IPv4 and IPv6 address.
+        The position of the object in the inventory is stored as well. The index is built on first use.
+
+        Parameters
+        ----------
+        object_type: (NBDevice, NBVM)
+            object type to index
+
+        Returns
+        -------
+        dict: {4: {"$ip_address": (position, object)}, 6: {"$ip_address": (position, object)}}
+        """
+
+        primary_ip_index = self._primary_ip_index.get(object_type)
+
+        if primary_ip_index is None:
+            primary_ip_index = {4: dict(), 6: dict()}
+            for position, device in enumerate(self.inventory.get_all_items(object_type)):
+                for ip_version in [4, 6]:
+                    ip = self.get_primary_ip_address(grab(device, f"data.primary_ip{ip_version}"))
+                    if ip is not None:
+                        primary_ip_index[ip_version].setdefault(ip, (position, device))
+
+            self._primary_ip_index[object_type] = primary_ip_index
+
+        return primary_ip_index
+
+    def get_primary_ip_owner_index(self):
+        """
+        Return all NBDevice and NBVM objects indexed by their assigned primary IP address objects.
+        The index is built on first use and afterwards extended by 'add_device_vm_to_inventory'.
+
+        Returns
+        -------
+        dict: {NBIPAddress: [list of NBDevice and NBVM objects]}
+        """
+
+        if self._primary_ip_owner_index is None:
+            self._primary_ip_owner_index = dict()
+            for object_type in [NBDevice, NBVM]:
+                for device_vm in self.inventory.get_all_items(object_type):
+                    for ip_version in [4, 6]:
+                        ip_object = grab(device_vm, f"data.primary_ip{ip_version}")
+                        if isinstance(ip_object, NBIPAddress):
+                            self._primary_ip_owner_index.setdefault(ip_object, list()).append(device_vm)
+
+        return self._primary_ip_owner_index
+
+    def get_cluster_name_index(self):
+        """
+        Return all NBCluster objects indexed by cluster name. The index is built on first use.
+
+        Returns
+        -------
+        dict: {"$cluster_name": [list of NBCluster objects]}
+        """
+
+        if self._cluster_name_index is None:
+            self._cluster_name_index = dict()
+            for cluster in self.inventory.get_all_items(NBCluster):
+                self._cluster_name_index.setdefault(grab(cluster, "data.name"), list()).append(cluster)
+
+        return self._cluster_name_index
+
     def get_object_based_on_primary_ip(self, object_type, primary_ip4=None, primary_ip6=None):
         """
-        Try to find a NBDevice or NBVM based on the primary IP address. If an exact
-        match was found the device/vm object will be returned immediately without
-        checking of the other primary IP address (if defined).
+        Try to find a NBDevice or NBVM based on the primary IP address. If both primary
+        IP addresses match different objects, the object which comes first in the
+        inventory will be returned.
 
         Parameters
         ----------
@@ -606,45 +812,44 @@ class VMWareHandler(SourceBase):
 
         """
 
-        def _matches_device_primary_ip(device_primary_ip, ip_needle):
+        if object_type not in device_vm_object_types:
+            raise ValueError(f"Object must be a '{NBVM.name}' or '{NBDevice.name}'.")
 
-            ip = None
-            if device_primary_ip is not None and ip_needle is not None:
-                if isinstance(device_primary_ip, dict):
-                    ip = grab(device_primary_ip, "address")
+        if primary_ip4 is None and primary_ip6 is None:
+            return
 
-                elif isinstance(device_primary_ip, int):
-                    ip = self.inventory.get_by_id(NBIPAddress, nb_id=device_primary_ip)
-                    ip = grab(ip, "data.address")
+        primary_ip_index = self.get_primary_ip_index(object_type)
 
-                if ip is not None and ip.split("/")[0] == ip_needle:
-                    return True
+        match = None
+        for ip_version, primary_ip in [(4, primary_ip4), (6, primary_ip6)]:
 
-            return False
+            if primary_ip is None:
+                continue
 
-        if object_type not in [NBDevice, NBVM]:
-            raise ValueError(f"Object must be a '{NBVM.name}' or '{NBDevice.name}'.")
+            primary_ip = str(primary_ip).partition("/")[0]
 
-        if primary_ip4 is None and primary_ip6 is None:
-            return
+            index_entry = primary_ip_index[ip_version].get(primary_ip)
+            if index_entry is None:
+                continue
 
-        if primary_ip4 is not None:
-            primary_ip4 = str(primary_ip4).split("/")[0]
+            position, device = index_entry
 
-        if primary_ip6 is not None:
-            primary_ip6 = str(primary_ip6).split("/")[0]
+            # skip if primary IP of this object has been changed since the index was built
+            if self.get_primary_ip_address(grab(device, f"data.primary_ip{ip_version}")) != primary_ip:
+                continue
+
+            # keep the object which comes first in the inventory, IPv4 wins for the same object
+            if match is None or position < match[0]:
+                match = (position, device, ip_version, primary_ip)
 
-        for device in self.inventory.get_all_items(object_type):
+        if match is None:
+            return
 
-            if _matches_device_primary_ip(grab(device, "data.primary_ip4"), primary_ip4) is True:
-                log.debug2(f"Found existing host '{device.get_display_name()}' "
-                           f"based on the primary IPv4 '{primary_ip4}'")
-                return device
+        _, device, ip_version, primary_ip = match
 
-            if _matches_device_primary_ip(grab(device, "data.primary_ip6"), primary_ip6) is True:
-                log.debug2(f"Found existing host '{device.get_display_name()}' "
-                           f"based on the primary IPv6 '{primary_ip6}'")
-                return device
+        log.debug2(f"Found existing host '{device.get_display_name()}' "
+                   f"based on the primary IPv{ip_version} '{primary_ip}'")
+        return device
 
     def get_vmware_object_tags(self, obj):
         """
@@ -676,13 +881,20 @@ class VMWareHandler(SourceBase):
 
             for tag_id in object_tag_ids:
 
-                # noinspection PyBroadException
-                try:
-                    tag_name = self.tag_session.tagging.Tag.get(tag_id).name
-                    tag_description = self.tag_session.tagging.Tag.get(tag_id).description
-                except Exception as e:
-                    log.error(f"Unable to retrieve vCenter tag '{tag_id}' for '{obj.name}': {e}")
-                    continue
+                # tag definitions are shared between objects, request each one only once
+                tag = self._tag_cache.get(tag_id)
+                if tag is None:
+                    # noinspection PyBroadException
+                    try:
+                        tag = self.tag_session.tagging.Tag.get(tag_id)
+                    except Exception as e:
+                        log.error(f"Unable to retrieve vCenter tag '{tag_id}' for '{obj.name}': {e}")
+                        continue
+
+                    self._tag_cache[tag_id] = tag
+
+                tag_name = grab(tag, "name")
+                tag_description = grab(tag, "description")
 
                 if tag_name is not None:
 
@@ -892,6 +1104,33 @@ class VMWareHandler(SourceBase):
 
         return return_custom_fields
 
+    def parse_relation_config(self, relation):
+        """
+        Split up a relation config option into the relation properties and the list of
+        relation regular expressions and assigned names.
+
+        Parameters
+        ----------
+        relation: str
+            name of the config variable relation (i.e: vm_tag_relation)
+
+        Returns
+        -------
+        tuple: (is_tag_relation, is_cluster_relation, [(object_regex, assigned_name), ...])
+        """
+
+        relation_name_parts = f"{relation}".split("_")
+
+        relation_config = (
+            grab(relation_name_parts, "1") == "tag",
+            grab(relation_name_parts, "0") == "cluster",
+            [(x.get("object_regex"), x.get("assigned_name")) for x in grab(self.settings, relation, fallback=list())]
+        )
+
+        self._relation_cfg[relation] = relation_config
+
+        return relation_config
+
     def get_object_relation(self, name, relation, fallback=None):
         """
 
@@ -910,29 +1149,35 @@ class VMWareHandler(SourceBase):
             string of matching relation or list of matching tags
         """
 
-        resolved_list = list()
-        for single_relation in grab(self.settings, relation, fallback=list()):
-            object_regex = single_relation.get("object_regex")
-            match_found = False
-            if object_regex.match(name):
-                resolved_name = single_relation.get("assigned_name")
-                log.debug2(f"Found a matching {relation} '{resolved_name}' ({object_regex.pattern}) for {name}")
-                resolved_list.append(resolved_name)
-                match_found = True
+        is_tag_relation, is_cluster_relation, relation_list = \
+            self._relation_cfg.get(relation) or self.parse_relation_config(relation)
 
-            # special cluster condition
-            if match_found is False and grab(f"{relation}".split("_"), "0") == "cluster":
+        resolved_list = self._relation_cache.get((name, relation))
 
-                stripped_name = "/".join(name.split("/")[1:])
-                if object_regex.match(stripped_name):
+        if resolved_list is None:
+            resolved_list = list()
+            stripped_name = None
+            for object_regex, assigned_name in relation_list:
+                if object_regex.match(name):
+                    log.debug2(f"Found a matching {relation} '{assigned_name}' ({object_regex.pattern}) for {name}")
+                    resolved_list.append(assigned_name)
 
-                    resolved_name = single_relation.get("assigned_name")
-                    log.debug2(f"Found a matching {relation} '{resolved_name}' ({object_regex.pattern}) "
-                               f"for {stripped_name}")
-                    resolved_list.append(resolved_name)
+                # special cluster condition
+                elif is_cluster_relation is True:
 
-        if grab(f"{relation}".split("_"), "1") == "tag":
-            return resolved_list
+                    if stripped_name is None:
+                        stripped_name = "/".join(name.split("/")[1:])
+
+                    if object_regex.match(stripped_name):
+                        log.debug2(f"Found a matching {relation} '{assigned_name}' ({object_regex.pattern}) "
+                                   f"for {stripped_name}")
+                        resolved_list.append(assigned_name)
+
+            self._relation_cache[(name, relation)] = resolved_list
+
+        if is_tag_relation is True:
+            # return a copy, the tag list gets extended by the caller
+            return list(resolved_list)
 
         else:
             resolved_name = fallback
@@ -1011,34 +1256,35 @@ class VMWareHandler(SourceBase):
 
         """
 
-        if object_type not in [NBDevice, NBVM]:
+        if object_type not in device_vm_object_types:
             raise ValueError(f"Object must be a '{NBVM.name}' or '{NBDevice.name}'.")
 
-        if log.level == DEBUG3:
-
-            log.debug3("function: add_device_vm_to_inventory")
-            log.debug3(f"Object type {object_type}")
-            pprint.pprint(object_data)
-            pprint.pprint(pnic_data)
-            pprint.pprint(vnic_data)
-            pprint.pprint(nic_ips)
-            pprint.pprint(p_ipv4)
-            pprint.pprint(p_ipv6)
-            pprint.pprint(disk_data)
+        # arguments are only formatted if DEBUG3 is enabled
+        log.debug3("function: add_device_vm_to_inventory")
+        log.debug3("Object type %s", object_type)
+        log.debug3("object_data: %r", object_data)
+        log.debug3("pnic_data: %r", pnic_data)
+        log.debug3("vnic_data: %r", vnic_data)
+        log.debug3("nic_ips: %r", nic_ips)
+        log.debug3("p_ipv4: %r", p_ipv4)
+        log.debug3("p_ipv6: %r", p_ipv6)
+        log.debug3("disk_data: %r", disk_data)
 
         # check existing Devices for matches
-        log.debug2(f"Trying to find a {object_type.name} based on the collected name, cluster, IP and MAC addresses")
+        log.debug2("Trying to find a %s based on the collected name, cluster, IP and MAC addresses",
+                   object_type.name)
 
         device_vm_object = self.inventory.get_by_data(object_type, data=object_data)
 
         if device_vm_object is not None:
-            log.debug2("Found a exact matching %s object: %s" %
-                       (object_type.name, device_vm_object.get_display_name(including_second_key=True)))
+            if log.isEnabledFor(DEBUG2):
+                log.debug2("Found a exact matching %s object: %s",
+                           object_type.name, device_vm_object.get_display_name(including_second_key=True))
 
         # keep searching if no exact match was found
         else:
 
-            log.debug2(f"No exact match found. Trying to find {object_type.name} based on MAC addresses")
+            log.debug2("No exact match found. Trying to find %s based on MAC addresses", object_type.name)
 
             # on VMs vnic data is used, on physical devices pnic data is used
             mac_source_data = vnic_data if object_type == NBVM else pnic_data
@@ -1052,24 +1298,25 @@ class VMWareHandler(SourceBase):
 
             if device_vm_object is None and object_data.get("serial") is not None and \
                     self.settings.match_host_by_serial is True:
-                log.debug2(f"No match found. Trying to find {object_type.name} based on serial number")
+                log.debug2("No match found. Trying to find %s based on serial number", object_type.name)
 
                 device_vm_object = self.inventory.get_by_data(object_type, data={"serial": object_data.get("serial")})
 
             if device_vm_object is None and object_data.get("asset_tag") is not None:
-                log.debug2(f"No match found. Trying to find {object_type.name} based on asset tag")
+                log.debug2("No match found. Trying to find %s based on asset tag", object_type.name)
 
                 device_vm_object = self.inventory.get_by_data(object_type,
                                                               data={"asset_tag": object_data.get("asset_tag")})
 
         if device_vm_object is not None:
-            log.debug2("Found a matching %s object: %s" %
-                       (object_type.name, device_vm_object.get_display_name(including_second_key=True)))
+            if log.isEnabledFor(DEBUG2):
+                log.debug2("Found a matching %s object: %s",
+                           object_type.name, device_vm_object.get_display_name(including_second_key=True))
 
         # keep looking for devices with the same primary IP
         else:
 
-            log.debug2(f"No match found. Trying to find {object_type.name} based on primary IP addresses")
+            log.debug2("No match found. Trying to find %s based on primary IP addresses", object_type.name)
 
             device_vm_object = self.get_object_based_on_primary_ip(object_type, p_ipv4, p_ipv6)
 
@@ -1117,7 +1364,7 @@ class VMWareHandler(SourceBase):
                 device_vm_object.remove_tags(object_tag)
 
         # update VM disk data information
-        if version.parse(self.inventory.netbox_api_version) >= version.parse("3.7.0") and \
+        if self.netbox_supports_virtual_disks is True and \
                 object_type == NBVM and disk_data is not None and len(disk_data) > 0:
 
             # create pairs of existing and discovered disks.
@@ -1179,6 +1426,8 @@ class VMWareHandler(SourceBase):
                                                                        int_data, nic_ips.get(int_name, list()),
                                                                        vmware_object=vmware_object)
 
+            self.add_interface_to_mac_index(nic_object)
+
             # add all interface IPs
             for ip_object in ip_address_objects:
 
@@ -1196,23 +1445,17 @@ class VMWareHandler(SourceBase):
                 ip_version = ip_interface_object.ip.version
                 if self.settings.set_primary_ip == "always":
 
-                    for object_type in [NBDevice, NBVM]:
+                    # new IPs don't need to be removed from other devices/VMs
+                    if ip_object.is_new is False:
 
-                        # new IPs don't need to be removed from other devices/VMs
-                        if ip_object.is_new is True:
-                            break
-
-                        for devices_vms in self.inventory.get_all_items(object_type):
-
-                            # device has no primary IP of this version
-                            this_primary_ip = grab(devices_vms, f"data.primary_ip{ip_version}")
+                        for devices_vms in self.get_primary_ip_owner_index().get(ip_object, list()):
 
                             # we found this exact object
                             if devices_vms == device_vm_object:
                                 continue
 
                             # device has the same object assigned
-                            if this_primary_ip == ip_object:
+                            if grab(devices_vms, f"data.primary_ip{ip_version}") == ip_object:
                                 devices_vms.unset_attribute(f"primary_ip{ip_version}")
 
                     set_this_primary_ip = True
@@ -1227,6 +1470,12 @@ class VMWareHandler(SourceBase):
                               f"'{device_vm_object.get_display_name()}'")
                     device_vm_object.update(data={f"primary_ip{ip_version}": ip_object})
 
+                    # index has not been built yet, object will be picked up from inventory
+                    if self._primary_ip_owner_index is not None:
+                        ip_owners = self._primary_ip_owner_index.setdefault(ip_object, list())
+                        if device_vm_object not in ip_owners:
+                            ip_owners.append(device_vm_object)
+
         return
 
     def get_parent_object_by_class(self, obj, object_class_to_find):
@@ -1258,6 +1507,41 @@ class VMWareHandler(SourceBase):
             self.recursion_level += 1
             return self.get_parent_object_by_class(parent, object_class_to_find)
 
+    def get_cluster_for_host(self, host):
+        """
+        Return the vCenter cluster (or single host ComputeResource) a host belongs to.
+
+        Resolving the parent objects requires a request to vCenter for each level.
+        The result is cached per host as it is requested for every VM running on it.
+
+        Parameters
+        ----------
+        host: vim.HostSystem
+            host object to find the cluster for
+
+        Returns
+        -------
+        (vim.ClusterComputeResource, vim.ComputeResource, None): cluster of this host if found
+        """
+
+        if host is None:
+            return
+
+        if host in self._host_to_cluster:
+            return self._host_to_cluster[host]
+
+        cluster_object = self.get_parent_object_by_class(host, vim.ClusterComputeResource)
+
+        # get single host 'cluster' if host is not part of a cluster
+        if cluster_object is None:
+            cluster_object = self.get_parent_object_by_class(host, vim.ComputeResource)
+
+        # don't cache failed lookups, the parent objects will be requested again next time
+        if cluster_object is not None:
+            self._host_to_cluster[host] = cluster_object
+
+        return cluster_object
+
     def add_object_to_cache(self, vm_object, netbox_object):
 
         if None in [vm_object, netbox_object]:
@@ -1265,34 +1549,49 @@ class VMWareHandler(SourceBase):
 
         # noinspection PyBroadException
         try:
-            vm_class_name = vm_object.__class__.__name__
             # noinspection PyProtectedMember
             vm_object_id = vm_object._GetMoId()
         except Exception:
             return
 
-        if self.object_cache.get(vm_class_name) is None:
-            self.object_cache[vm_class_name] = dict()
+        # objects are cached per pyVmomi class, the class itself is used as key
+        vm_class = type(vm_object)
 
-        self.object_cache[vm_class_name][vm_object_id] = netbox_object
+        self.object_cache.setdefault(vm_class, dict())[vm_object_id] = netbox_object
 
     def get_object_from_cache(self, vm_object):
 
         if vm_object is None:
             return
 
+        class_cache = self.object_cache.get(type(vm_object))
+
+        if class_cache is None:
+            return
+
         # noinspection PyBroadException
         try:
-            vm_class_name = vm_object.__class__.__name__
             # noinspection PyProtectedMember
             vm_object_id = vm_object._GetMoId()
         except Exception:
             return
 
-        if self.object_cache.get(vm_class_name) is None:
-            return
+        return class_cache.get(vm_object_id)
 
-        return self.object_cache[vm_class_name].get(vm_object_id)
+    def get_source_cluster_group(self):
+        """
+        Return the NBClusterGroup named after this source, used if 'set_source_name_as_cluster_group'
+        is enabled. The group is looked up once per apply() run after it has been added by 'add_datacenter'.
+
+        Returns
+        -------
+        NBClusterGroup, None: cluster group object if found
+        """
+
+        if self._source_cluster_group is None:
+            self._source_cluster_group = self.inventory.get_by_data(NBClusterGroup, data={"name": self.name})
+
+        return self._source_cluster_group
 
     def add_datacenter(self, obj):
         """
@@ -1345,7 +1644,7 @@ class VMWareHandler(SourceBase):
 
         name = get_string_or_none(grab(obj, "name"))
         if self.settings.set_source_name_as_cluster_group is True:
-            group = self.inventory.get_by_data(NBClusterGroup, data={"name": self.name})
+            group = self.get_source_cluster_group()
         else:
             group = self.get_object_from_cache(self.get_parent_object_by_class(obj, vim.Datacenter))
 
@@ -1355,7 +1654,7 @@ class VMWareHandler(SourceBase):
         # if we're parsing a single host "cluster" and the hosts domain name should be stripped,
         # then the ComputeResources domain name gets stripped as well
         if isinstance(obj, vim.ComputeResource) and self.settings.strip_host_domain_name is True:
-            name = name.split(".")[0]
+            name = name.partition(".")[0]
 
         group_name = grab(group, "data.name")
         full_cluster_name = f"{group_name}/{name}"
@@ -1393,7 +1692,8 @@ class VMWareHandler(SourceBase):
         log.debug2("Trying to find a matching existing cluster")
         cluster_object = None
         fallback_cluster_object = None
-        for cluster_candidate in self.inventory.get_all_items(NBCluster):
+        for cluster_candidate in self.get_cluster_name_index().get(name, list()):
+            # index entry is outdated if the cluster has been renamed
             if grab(cluster_candidate, "data.name") != name:
                 continue
 
@@ -1432,6 +1732,10 @@ class VMWareHandler(SourceBase):
         else:
             cluster_object = self.inventory.add_update_object(NBCluster, data=data, source=self)
 
+            cluster_candidates = self.get_cluster_name_index().setdefault(name, list())
+            if cluster_object not in cluster_candidates:
+                cluster_candidates.append(cluster_object)
+
         self.add_object_to_cache(obj, cluster_object)
 
     def add_virtual_switch(self, obj):
@@ -1540,7 +1844,7 @@ class VMWareHandler(SourceBase):
         name = get_string_or_none(grab(obj, "name"))
 
         if name is not None and self.settings.strip_host_domain_name is True:
-            name = name.split(".")[0]
+            name = name.partition(".")[0]
 
         # parse data
         log.debug(f"Parsing vCenter host: {name}")
@@ -1550,16 +1854,13 @@ class VMWareHandler(SourceBase):
         #
 
         # manage site and cluster
-        cluster_object = self.get_parent_object_by_class(obj, vim.ClusterComputeResource)
-
-        if cluster_object is None:
-            cluster_object = self.get_parent_object_by_class(obj, vim.ComputeResource)
+        cluster_object = self.get_cluster_for_host(obj)
 
         if cluster_object is None:
             log.error(f"Requesting cluster for host '{name}' failed. Skipping.")
             return
 
-        if log.level == DEBUG3:
+        if self.debug3_enabled is True:
             try:
                 log.info("Cluster data")
                 dump(cluster_object)
@@ -1577,22 +1878,19 @@ class VMWareHandler(SourceBase):
 
         # get a site for this host
         if self.settings.set_source_name_as_cluster_group is True:
-            group = self.inventory.get_by_data(NBClusterGroup, data={"name": self.name})
+            group = self.get_source_cluster_group()
         else:
             group = self.get_object_from_cache(self.get_parent_object_by_class(obj, vim.Datacenter))
         group_name = grab(group, "data.name")
         site_name = self.get_site_name(NBDevice, name, f"{group_name}/{cluster_name}")
 
-        if name in self.processed_host_names.get(site_name, list()) and obj not in self.objects_to_reevaluate:
+        if name in self.processed_host_names.get(site_name, set()) and obj not in self.objects_to_reevaluate:
             log.warning(f"Host '{name}' for site '{site_name}' already parsed. "
                         "Make sure to use unique host names. Skipping")
             return
 
         # add host to processed list
-        if self.processed_host_names.get(site_name) is None:
-            self.processed_host_names[site_name] = list()
-
-        self.processed_host_names[site_name].append(name)
+        self.processed_host_names.setdefault(site_name, set()).add(name)
 
         # filter hosts by name
         if self.passes_filter(name, self.settings.host_include_filter, self.settings.host_exclude_filter) is False:
@@ -1602,11 +1900,15 @@ class VMWareHandler(SourceBase):
         # Collecting data
         #
 
+        # every property access on a vCenter object is a request, fetch summary and network config once
+        host_summary = grab(obj, "summary")
+        host_network_config = grab(obj, "config.network")
+
         # collect all necessary data
-        manufacturer = get_string_or_none(grab(obj, "summary.hardware.vendor"))
-        model = get_string_or_none(grab(obj, "summary.hardware.model"))
-        product_name = get_string_or_none(grab(obj, "summary.config.product.name"))
-        product_version = get_string_or_none(grab(obj, "summary.config.product.version"))
+        manufacturer = get_string_or_none(grab(host_summary, "hardware.vendor"))
+        model = get_string_or_none(grab(host_summary, "hardware.model"))
+        product_name = get_string_or_none(grab(host_summary, "config.product.name"))
+        product_version = get_string_or_none(grab(host_summary, "config.product.version"))
         platform = f"{product_name} {product_version}"
 
         # if the device vendor/model cannot be retrieved (due to problem on the host),
@@ -1618,11 +1920,11 @@ class VMWareHandler(SourceBase):
 
         # get status
         status = "offline"
-        if get_string_or_none(grab(obj, "summary.runtime.connectionState")) == "connected":
+        if get_string_or_none(grab(host_summary, "runtime.connectionState")) == "connected":
             status = "active"
 
         # prepare identifiers to find asset tag and serial number
-        identifiers = grab(obj, "summary.hardware.otherIdentifyingInfo", fallback=list())
+        identifiers = grab(host_summary, "hardware.otherIdentifyingInfo", fallback=list())
         identifier_dict = dict()
         for item in identifiers:
             value = grab(item, "identifierValue", fallback="")
@@ -1693,7 +1995,7 @@ class VMWareHandler(SourceBase):
 
         # iterate over hosts virtual switches, needed to enrich data on physical interfaces
         self.network_data["vswitch"][name] = dict()
-        for vswitch in grab(obj, "config.network.vswitch", fallback=list()):
+        for vswitch in grab(host_network_config, "vswitch", fallback=list()):
 
             vswitch_name = unquote(grab(vswitch, "name"))
 
@@ -1711,7 +2013,7 @@ class VMWareHandler(SourceBase):
         # iterate over hosts proxy switches, needed to enrich data on physical interfaces
         # also stores data on proxy switch configured mtu which is used for VM interfaces
         self.network_data["pswitch"][name] = dict()
-        for pswitch in grab(obj, "config.network.proxySwitch", fallback=list()):
+        for pswitch in grab(host_network_config, "proxySwitch", fallback=list()):
 
             pswitch_uuid = grab(pswitch, "dvsUuid")
             pswitch_name = unquote(grab(pswitch, "dvsName"))
@@ -1729,7 +2031,7 @@ class VMWareHandler(SourceBase):
 
         # iterate over hosts port groups, needed to enrich data on physical interfaces
         self.network_data["host_pgroup"][name] = dict()
-        for pgroup in grab(obj, "config.network.portgroup", fallback=list()):
+        for pgroup in grab(host_network_config, "portgroup", fallback=list()):
 
             pgroup_name = grab(pgroup, "spec.name")
 
@@ -1752,7 +2054,7 @@ class VMWareHandler(SourceBase):
 
         # now iterate over all physical interfaces and collect data
         pnic_data_dict = dict()
-        for pnic in grab(obj, "config.network.pnic", fallback=list()):
+        for pnic in grab(host_network_config, "pnic", fallback=list()):
 
             pnic_name = grab(pnic, "device")
             pnic_key = grab(pnic, "key")
@@ -1835,7 +2137,7 @@ class VMWareHandler(SourceBase):
                 pnic_data["mode"] = pnic_mode
 
             # add link speed and duplex attributes
-            if version.parse(self.inventory.netbox_api_version) >= version.parse("3.2.0"):
+            if self.netbox_supports_interface_speed is True:
                 if pnic_link_speed is not None:
                     pnic_data["speed"] = pnic_link_speed * 1000
                 if pnic_link_duplex is not None:
@@ -1881,7 +2183,7 @@ class VMWareHandler(SourceBase):
         # now iterate over all virtual interfaces and collect data
         vnic_data_dict = dict()
         vnic_ips = dict()
-        for vnic in grab(obj, "config.network.vnic", fallback=list()):
+        for vnic in grab(host_network_config, "vnic", fallback=list()):
 
             vnic_name = grab(vnic, "device")
 
@@ -1995,12 +2297,14 @@ class VMWareHandler(SourceBase):
 
                 vnic_is_primary = True
 
-            if vnic_ips.get(vnic_name) is None:
-                vnic_ips[vnic_name] = list()
+            vnic_ips.setdefault(vnic_name, list())
 
-            int_v4 = "{}/{}".format(grab(vnic, "spec.ip.ipAddress"), grab(vnic, "spec.ip.subnetMask"))
+            int_v4_address = grab(vnic, "spec.ip.ipAddress")
+            int_v4 = "{}/{}".format(int_v4_address, grab(vnic, "spec.ip.subnetMask"))
 
-            if self.settings.permitted_subnets.permitted(int_v4, interface_name=vnic_name) is True:
+            # skip the permitted subnets check for interfaces without an IPv4 address
+            if int_v4_address is not None and \
+                    self.settings.permitted_subnets.permitted(int_v4, interface_name=vnic_name) is True:
                 vnic_ips[vnic_name].append(int_v4)
 
                 if vnic_is_primary is True and host_primary_ip4 is None:
@@ -2056,14 +2360,17 @@ class VMWareHandler(SourceBase):
         name = get_string_or_none(grab(obj, "name"))
 
         if name is not None and self.settings.strip_vm_domain_name is True:
-            name = name.split(".")[0]
+            name = name.partition(".")[0]
 
         #
         # Filtering
         #
 
+        # every property access on a vCenter object is a request, fetch config once
+        vm_config = grab(obj, "config")
+
         # get VM UUID
-        vm_uuid = grab(obj, "config.instanceUuid")
+        vm_uuid = grab(vm_config, "instanceUuid")
 
         if vm_uuid is None or vm_uuid in self.processed_vm_uuid and obj not in self.objects_to_reevaluate:
             return
@@ -2074,13 +2381,13 @@ class VMWareHandler(SourceBase):
         status = "active" if get_string_or_none(grab(obj, "runtime.powerState")) == "poweredOn" else "offline"
 
         # check if vm is template
-        template = grab(obj, "config.template")
+        template = grab(vm_config, "template")
         if bool(self.settings.skip_vm_templates) is True and template is True:
             log.debug2(f"VM '{name}' is a template. Skipping")
             return
 
         if bool(self.settings.skip_srm_placeholder_vms) is True \
-                and f"{grab(obj, 'config.managedBy.extensionKey')}".startswith("com.vmware.vcDr"):
+                and f"{grab(vm_config, 'managedBy.extensionKey')}".startswith("com.vmware.vcDr"):
             log.debug2(f"VM '{name}' is a SRM placeholder VM. Skipping")
             return
 
@@ -2090,17 +2397,13 @@ class VMWareHandler(SourceBase):
             return
 
         # add to processed VMs
-        self.processed_vm_uuid.append(vm_uuid)
+        self.processed_vm_uuid.add(vm_uuid)
 
         parent_host = self.get_parent_object_by_class(grab(obj, "runtime.host"), vim.HostSystem)
-        cluster_object = self.get_parent_object_by_class(parent_host, vim.ClusterComputeResource)
-
-        # get single host 'cluster' if VM runs on one
-        if cluster_object is None:
-            cluster_object = self.get_parent_object_by_class(parent_host, vim.ComputeResource)
+        cluster_object = self.get_cluster_for_host(parent_host)
 
         if self.settings.set_source_name_as_cluster_group is True:
-            group = self.inventory.get_by_data(NBClusterGroup, data={"name": self.name})
+            group = self.get_source_cluster_group()
         else:
             group = self.get_parent_object_by_class(cluster_object, vim.Datacenter)
 
@@ -2119,16 +2422,13 @@ class VMWareHandler(SourceBase):
         cluster_name = grab(nb_cluster_object, "data.name")
         cluster_full_name = f"{group.name}/{cluster_name}"
 
-        if name in self.processed_vm_names.get(cluster_full_name, list()) and obj not in self.objects_to_reevaluate:
+        if name in self.processed_vm_names.get(cluster_full_name, set()) and obj not in self.objects_to_reevaluate:
             log.warning(f"Virtual machine '{name}' for cluster '{cluster_full_name}' already parsed. "
                         "Make sure to use unique VM names. Skipping")
             return
 
         # add vm to processed list
-        if self.processed_vm_names.get(cluster_full_name) is None:
-            self.processed_vm_names[cluster_full_name] = list()
-
-        self.processed_vm_names[cluster_full_name].append(name)
+        self.processed_vm_names.setdefault(cluster_full_name, set()).add(name)
 
         # filter VMs by name
         if self.passes_filter(name, self.settings.vm_include_filter, self.settings.vm_exclude_filter) is False:
@@ -2143,18 +2443,20 @@ class VMWareHandler(SourceBase):
         if site_name is None:
             site_name = self.get_site_name(NBCluster, cluster_full_name)
 
+        vm_guest = grab(obj, "guest")
+
         # first check against vm_platform_relation
-        platform = get_string_or_none(grab(obj, "config.guestFullName"))
-        platform = get_string_or_none(grab(obj, "guest.guestFullName", fallback=platform))
+        platform = get_string_or_none(grab(vm_config, "guestFullName"))
+        platform = get_string_or_none(grab(vm_guest, "guestFullName", fallback=platform))
 
         if platform is not None:
             platform = self.get_object_relation(platform, "vm_platform_relation", fallback=platform)
 
-        hardware_devices = grab(obj, "config.hardware.device", fallback=list())
+        hardware_devices = grab(vm_config, "hardware.device", fallback=list())
 
         annotation = None
         if self.settings.skip_vm_comments is False:
-            annotation = get_string_or_none(grab(obj, "config.annotation"))
+            annotation = get_string_or_none(grab(vm_config, "annotation"))
 
         # assign vm_tenant_relation
         tenant_name = self.get_object_relation(name, "vm_tenant_relation")
@@ -2169,23 +2471,22 @@ class VMWareHandler(SourceBase):
             "name": name,
             "cluster": nb_cluster_object,
             "status": status,
-            "memory": grab(obj, "config.hardware.memoryMB"),
-            "vcpus": grab(obj, "config.hardware.numCPU")
+            "memory": grab(vm_config, "hardware.memoryMB"),
+            "vcpus": grab(vm_config, "hardware.numCPU")
         }
 
         # Add adaption for change in NetBox 3.3.0 VM model
         # issue: https://github.com/netbox-community/netbox/issues/10131#issuecomment-1225783758
-        if version.parse(self.inventory.netbox_api_version) >= version.parse("3.3.0"):
+        if self.netbox_supports_vm_site is True:
             vm_data["site"] = {"name": site_name}
 
             if self.settings.track_vm_host:
                 vm_data["device"] = self.get_object_from_cache(parent_host)
 
         # Add adaption for added virtual disks in NetBox 3.7.0
-        if version.parse(self.inventory.netbox_api_version) < version.parse("3.7.0"):
-            vm_data["disk"] = int(sum([getattr(comp, "capacityInKB", 0) for comp in hardware_devices
-                                       if isinstance(comp, vim.vm.device.VirtualDisk)
-                                       ]) / 1024 / 1024)
+        if self.netbox_supports_virtual_disks is False:
+            vm_data["disk"] = int(sum(getattr(comp, "capacityInKB", 0) for comp in hardware_devices
+                                      if isinstance(comp, vim.vm.device.VirtualDisk)) / 1024 / 1024)
 
         if platform is not None:
             vm_data["platform"] = {"name": platform}
@@ -2207,7 +2508,7 @@ class VMWareHandler(SourceBase):
         vm_default_gateway_ip6 = None
 
         # check vm routing to determine which is the default interface for each IP version
-        for route in grab(obj, "guest.ipStack.0.ipRouteConfig.ipRoute", fallback=list()):
+        for route in grab(vm_guest, "ipStack.0.ipRouteConfig.ipRoute", fallback=list()):
 
             # we found a default route
             if grab(route, "prefixLength") == 0:
@@ -2233,6 +2534,8 @@ class VMWareHandler(SourceBase):
         nic_ips = dict()
         disk_data = list()
 
+        guest_nics = grab(vm_guest, "net", fallback=list())
+
         # track MAC addresses in order add dummy guest interfaces
         processed_interface_macs = list()
 
@@ -2364,7 +2667,7 @@ class VMWareHandler(SourceBase):
                 int_description = f"{int_description} ({vlan_description})"
 
             # find corresponding guest NIC and get IP addresses and connected status
-            for guest_nic in grab(obj, "guest.net", fallback=list()):
+            for guest_nic in guest_nics:
 
                 # get matching guest NIC
                 if int_mac != normalize_mac_address(grab(guest_nic, "macAddress")):
@@ -2372,8 +2675,7 @@ class VMWareHandler(SourceBase):
 
                 int_connected = grab(guest_nic, "connected", fallback=int_connected)
 
-                if nic_ips.get(int_full_name) is None:
-                    nic_ips[int_full_name] = list()
+                nic_ips.setdefault(int_full_name, list())
 
                 # grab all valid interface IP addresses
                 for int_ip in grab(guest_nic, "ipConfig.ipAddress", fallback=list()):
@@ -2387,14 +2689,19 @@ class VMWareHandler(SourceBase):
 
                     # check if primary gateways are in the subnet of this IP address
                     # if it matches IP gets chosen as primary IP
+                    if vm_default_gateway_ip4 is None and vm_default_gateway_ip6 is None:
+                        continue
+
+                    int_ip_network = ip_interface(int_ip_address).network
+
                     if vm_default_gateway_ip4 is not None and \
-                            vm_default_gateway_ip4 in ip_interface(int_ip_address).network and \
+                            vm_default_gateway_ip4 in int_ip_network and \
                             vm_primary_ip4 is None:
 
                         vm_primary_ip4 = int_ip_address
 
                     if vm_default_gateway_ip6 is not None and \
-                            vm_default_gateway_ip6 in ip_interface(int_ip_address).network and \
+                            vm_default_gateway_ip6 in int_ip_network and \
                             vm_primary_ip6 is None:
 
                         vm_primary_ip6 = int_ip_address
@@ -2445,7 +2752,7 @@ class VMWareHandler(SourceBase):
 
         # find dummy guest NIC interfaces
         if self.settings.sync_vm_dummy_interfaces is True:
-            for guest_nic in grab(obj, "guest.net", fallback=list()):
+            for guest_nic in guest_nics:
 
                 # get matching guest NIC MAC
                 guest_nic_mac = normalize_mac_address(grab(guest_nic, "macAddress"))
@@ -2460,8 +2767,7 @@ class VMWareHandler(SourceBase):
 
                 log.debug2(f"Parsing dummy network device: {guest_nic_mac}")
 
-                if nic_ips.get(int_full_name) is None:
-                    nic_ips[int_full_name] = list()
+                nic_ips.setdefault(int_full_name, list())
 
                 # grab all valid interface IP addresses
                 for int_ip in grab(guest_nic, "ipConfig.ipAddress", fallback=list()):